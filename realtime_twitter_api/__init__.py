@@ -1,67 +1,417 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import copy
+import email.utils
+import functools
 import re
-from typing import Any, Literal
+import threading
+import time
+from collections import namedtuple
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Iterator, Literal
+from urllib.parse import urlencode
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# orjson で一度にパースする方が速いので、ijson は orjson が無く
+# Cバックエンドが使える場合のみストリーミングパースに使う
+try:
+    import orjson as _json
+    _ijson = None
+except ImportError:
+    import json as _json
+
+    try:
+        import ijson.backends.yajl2_c as _ijson
+    except ImportError:
+        _ijson = None
 
 BASE_URL = 'https://search.yahoo.co.jp/realtime'
 
+USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36'
+)
+TIMEOUT = (5, 30)
+PAGE_SIZE = 10
+ASYNC_LIMIT_PER_HOST = 64
+
+TRANSITION_CACHE_TTL = 60
+
+# 1秒あたりのリクエスト数の上限と、一度に送れるリクエスト数
+RATE_LIMIT = 10
+RATE_LIMIT_BURST = 20
+
+# True にするとAPIが新着順でツイートを返しているかを検証する
+_DEBUG = False
+
+_RETRY_TOTAL = 3
+_RETRY_BACKOFF = 0.3
+_RETRY_STATUS = (429, 503)
+
+_TAG_RE = re.compile(r'\tSTART\t(.+?)\tEND\t')
+_TWEET_ID_RE = re.compile(r'/realtime/search/tweet/(\d+)')
+
+_TAG_START = '\tSTART\t'
+_EXPANDED_URL = itemgetter('expandedUrl')
+_TEXT = itemgetter('text')
+_ID = itemgetter('id')
+
+_NEXT_DATA_OPEN = b'<script id="__NEXT_DATA__" type="application/json">'
+_NEXT_DATA_CLOSE = b'</script>'
+
+# 同一ホストへの接続を使い回すためのセッション
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(total=_RETRY_TOTAL, backoff_factor=_RETRY_BACKOFF, status_forcelist=_RETRY_STATUS)
+))
+_SESSION.headers['Connection'] = 'keep-alive'
+_SESSION.headers['User-Agent'] = USER_AGENT
+
+# 非同期API用のセッション。実行中のイベントループ上で遅延生成する
+_ASYNC_SESSION: aiohttp.ClientSession | None = None
+_ASYNC_SESSION_LOOP: asyncio.AbstractEventLoop | None = None
+
+# get_transition の結果のキャッシュ。キーは引数、値は (結果, 取得時刻)
+_TRANSITION_CACHE_SIZE = 1024
+_transition_cache: dict[tuple[str, bool, int, int], tuple[dict[str, Any], float]] = {}
+
+# 条件付きGETのキャッシュ。キーはURL、値は (送信するヘッダー, パース済みのデータ)
+_CONDITIONAL_CACHE_SIZE = 128
+_conditional_cache: dict[str, tuple[dict[str, str], Any]] = {}
+
 # ==============================================================
 
-def get_next_data(url: str) -> dict | list | Any:
-    response_text = requests.get(url).text
-    return json.loads(re.findall(r'<script id="__NEXT_DATA__" type="application/json">(.+?)</script>', response_text)[0])
+class _TokenBucket:
+    def __init__(self, rate: float, capacity: int) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        # トークンを1つ予約し、使えるようになるまでの秒数を返す
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self) -> None:
+        wait = self._reserve()
+        if wait:
+            time.sleep(wait)
+
+    async def aacquire(self) -> None:
+        wait = self._reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+
+_LIMITER = _TokenBucket(RATE_LIMIT, RATE_LIMIT_BURST)
+
+
+def set_rate_limit(rate: float, burst: int | None = None) -> None:
+    """リクエストの頻度の上限を変更する
+
+    Args:
+        rate (float): 1秒あたりのリクエスト数
+        burst (int | None, optional): 一度に送れるリクエスト数。デフォルトは rate の2倍
+    """
+
+    global _LIMITER
+
+    if rate <= 0:
+        raise ValueError('rate は0より大きい値にしてください')
+
+    if burst is None:
+        burst = max(1, int(rate * 2))
+    elif burst < 1:
+        raise ValueError('burst は1以上にしてください')
+
+    _LIMITER = _TokenBucket(rate, burst)
+
+
+def _get(url: str, **kwargs: Any) -> requests.Response:
+    _LIMITER.acquire()
+    return _SESSION.get(url, timeout=TIMEOUT, **kwargs)
+
+
+def _parse_retry_after(value: str | None, default: float) -> float:
+    if value is None:
+        return default
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+def _conditional_get(url: str, parse: Callable[[requests.Response], Any]) -> Any:
+    # ETag / Last-Modified があれば条件付きで取得し、304 のときは前回のパース結果を返す
+    # 呼び出し元がパース結果を書き換えてもキャッシュに影響しないよう、保存と返却の際に複製する
+    cached = _conditional_cache.pop(url, None)
+
+    try:
+        response = _get(url, headers=cached and cached[0])
+
+        if cached and response.status_code == 304:
+            return copy.deepcopy(cached[1])
+
+        data = parse(response)
+
+        validators = {}
+        if 'ETag' in response.headers:
+            validators['If-None-Match'] = response.headers['ETag']
+        if 'Last-Modified' in response.headers:
+            validators['If-Modified-Since'] = response.headers['Last-Modified']
+
+        cached = (validators, copy.deepcopy(data)) if validators else None
+
+        return data
+    finally:
+        # 取得に失敗したときは前回のエントリを残す
+        if cached:
+            _conditional_cache[url] = cached
+            if len(_conditional_cache) > _CONDITIONAL_CACHE_SIZE:
+                del _conditional_cache[next(iter(_conditional_cache))]
+
 
+def _parse_next_data(response: requests.Response) -> dict | list | Any:
+    # Next.js のエラーページにも __NEXT_DATA__ があるので先にステータスを確認する
+    response.raise_for_status()
+    response_body = response.content
 
-def get_json(url: str) -> dict | list | Any:
-    response_text = requests.get(url).text
-    return json.loads(response_text)
+    start = response_body.find(_NEXT_DATA_OPEN)
+    end = -1
+    if start != -1:
+        start += len(_NEXT_DATA_OPEN)
+        end = response_body.find(_NEXT_DATA_CLOSE, start)
 
+    if end == -1:
+        raise ValueError(f'{response.url} に __NEXT_DATA__ が見つかりません')
 
-def get_tweets_by_url(url: str) -> list[dict[str, Any]]:
-    return get_json(url)['timeline']['entry']
+    return _json.loads(response_body[start:end])
+
+
+def _parse_json(response: requests.Response) -> dict | list | Any:
+    response.raise_for_status()
+    return _json.loads(response.content)
+
+
+def get_next_data(url: str, conditional: bool = False) -> dict | list | Any:
+    # conditional=True はポーリングされるページ向け。前回のパース結果を保持する
+    if conditional:
+        return _conditional_get(url, _parse_next_data)
+    return _parse_next_data(_get(url))
+
+
+def get_json(url: str, conditional: bool = False) -> dict | list | Any:
+    if conditional:
+        return _conditional_get(url, _parse_json)
+    return _parse_json(_get(url))
+
+
+def get_tweets_by_url(url: str) -> Iterator[dict[str, Any]]:
+    if _ijson is None:
+        yield from get_json(url)['timeline']['entry']
+        return
+
+    with _get(url, stream=True) as response:
+        response.raise_for_status()
+        # gzip などの Content-Encoding を展開してから読む
+        response.raw.decode_content = True
+
+        for key, value in _ijson.kvitems(response.raw, 'timeline', use_float=True):
+            if key == 'entry':
+                yield from value
+                return
+
+    # timeline.entry が無いエラーレスポンスを「結果なし」と区別する
+    raise KeyError('timeline.entry')
+
+
+def _new_async_session(limit_per_host: int) -> aiohttp.ClientSession:
+    if aiohttp is None:
+        raise ImportError('非同期APIを使用するには aiohttp をインストールしてください')
+
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit_per_host=limit_per_host),
+        headers={'User-Agent': USER_AGENT},
+        timeout=aiohttp.ClientTimeout(sock_connect=TIMEOUT[0], sock_read=TIMEOUT[1])
+    )
+
+
+def _get_async_session() -> aiohttp.ClientSession:
+    global _ASYNC_SESSION, _ASYNC_SESSION_LOOP
+
+    loop = asyncio.get_running_loop()
+    if _ASYNC_SESSION is None or _ASYNC_SESSION.closed or _ASYNC_SESSION_LOOP is not loop:
+        _ASYNC_SESSION = _new_async_session(ASYNC_LIMIT_PER_HOST)
+        _ASYNC_SESSION_LOOP = loop
+
+    return _ASYNC_SESSION
+
+
+async def close_async_session() -> None:
+    """非同期API用のセッションを閉じる
+    """
+
+    global _ASYNC_SESSION, _ASYNC_SESSION_LOOP
+
+    if _ASYNC_SESSION is not None:
+        await _ASYNC_SESSION.close()
+
+    _ASYNC_SESSION = None
+    _ASYNC_SESSION_LOOP = None
+
+
+async def aget_json(url: str, session: aiohttp.ClientSession | None = None) -> dict | list | Any:
+    session = session or _get_async_session()
+
+    for attempt in range(_RETRY_TOTAL + 1):
+        await _LIMITER.aacquire()
+        delay = _RETRY_BACKOFF * 2 ** attempt
+
+        try:
+            async with session.get(url) as response:
+                if response.status not in _RETRY_STATUS or attempt == _RETRY_TOTAL:
+                    # 再試行しきれなかった場合やエラーページはJSONとしてパースしない
+                    response.raise_for_status()
+                    response_body = await response.read()
+                    break
+                delay = _parse_retry_after(response.headers.get('Retry-After'), delay)
+        except aiohttp.ClientResponseError:
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if attempt == _RETRY_TOTAL:
+                raise
+
+        await asyncio.sleep(delay)
+
+    return _json.loads(response_body)
+
+
+async def aget_tweets_by_url(url: str, session: aiohttp.ClientSession | None = None) -> list[dict[str, Any]]:
+    return (await aget_json(url, session))['timeline']['entry']
+
+
+_CREATED_AT = attrgetter('created_at')
 
 
 def sort_tweets(tweet_list: list[Tweet]) -> list[Tweet]:
-    return sorted(tweet_list, key=lambda x: x.created_at, reverse=True)
+    return sorted(tweet_list, key=_CREATED_AT, reverse=True)
 
 
-def search_tweet_by_id(id: str | int) -> Tweet:
+def _check_order(tweet_list: list[Tweet]) -> list[Tweet]:
+    # 新着順のAPIは既に新しい順で返すので並べ替えはしない
+    if _DEBUG:
+        assert tweet_list == sort_tweets(tweet_list), 'ツイートが新着順に並んでいません'
+    return tweet_list
+
+
+@functools.lru_cache(maxsize=4096)
+def _get_best_tweet_data(id: str) -> dict[str, Any]:
     url = BASE_URL + f'/search/tweet/{id}'
     next_data = get_next_data(url)
-    return Tweet(next_data['props']['pageProps']['pageData']['bestTweet'])
+    return next_data['props']['pageProps']['pageData']['bestTweet']
+
+
+def search_tweet_by_id(id: str | int) -> Tweet:
+    # Tweet はリプライの取得位置を持つので、キャッシュするのは元データだけにする
+    return Tweet(_get_best_tweet_data(str(id)))
+
+
+def cache_clear() -> None:
+    """search_tweet_by_id と get_transition、条件付きGETのキャッシュを消去する
+    """
+
+    _get_best_tweet_data.cache_clear()
+    _transition_cache.clear()
+    _conditional_cache.clear()
+
+
+TrendItem = namedtuple('TrendItem', 'query rank_up tweet_count genre child_buzz')
+TweetItem = namedtuple('TweetItem', 'id body image_url reply_count rt_count like_count time')
+
+# APIのキーを TrendItem / TweetItem のフィールド順に取り出す
+_TREND_FIELDS = itemgetter('query', 'rankUp', 'tweetCount', 'genre', 'childBuzz')
+_POPTW_FIELDS = itemgetter('body', 'imageUrl', 'reply', 'rt', 'like', 'time')
+_QUERY = itemgetter('query')
 
 
 def make_trend_dict(trend_items = None, tweet_items = None, hotbuzz_items = None) -> dict[Literal['trend', 'tweet', 'word'], Any]:
     trend_dict = {}
 
     if trend_items:
-        trend_dict['trend'] = [{
-            'query': item['query'],
-            'rank_up': item['rankUp'],
-            'tweet_count': item['tweetCount'],
-            'genre': item['genre'],
-            'child_buzz': item['childBuzz']
-        } for item in trend_items]
+        trend_dict['trend'] = list(map(TrendItem._make, map(_TREND_FIELDS, trend_items)))
 
     if tweet_items:
-        trend_dict['tweet'] = [{
-            'id': re.findall(r'/realtime/search/tweet/(\d+)', item['url'])[0],
-            'body': item['body'],
-            'image_url': item['imageUrl'],
-            'reply_count': item['reply'],
-            'rt_count': item['rt'],
-            'like_count': item['like'],
-            'time': item['time']
-        } for item in tweet_items]
+        trend_dict['tweet'] = [
+            TweetItem(_TWEET_ID_RE.search(item['url']).group(1), *_POPTW_FIELDS(item))
+            for item in tweet_items
+        ]
 
     if hotbuzz_items:
-        trend_dict['hotbuzz'] = [item['query'] for item in hotbuzz_items]
+        trend_dict['hotbuzz'] = list(map(_QUERY, hotbuzz_items))
 
     return trend_dict
 
+
+def _decode_content(tweet_data: dict[str, Any]) -> str:
+    display_text = tweet_data['displayText']
+    # タグを含まないツイートは正規表現を通さない
+    return _TAG_RE.sub(r'\1', display_text) if _TAG_START in display_text else display_text
+
+
+def _decode_quoted_tweet(tweet_data: dict[str, Any]) -> str | None:
+    quoted_tweet = tweet_data.get('quotedTweet')
+    return quoted_tweet and quoted_tweet['url'].split('?')[0]
+
+
+def _decode_media(tweet_data: dict[str, Any]) -> list[dict[str, str]]:
+    return [
+        {
+            'type': media['type'],
+            'url': media['item']['url']
+        } for media in tweet_data.get('media', ())
+    ]
+
+
+# Tweet の属性のうち、初めて参照されたときに元データから変換するもの
+_LAZY_TWEET_FIELDS: dict[str, Callable[[dict[str, Any]], Any]] = {
+    'content': _decode_content,
+    'verified': itemgetter('verified'),
+    'urls': lambda tweet_data: list(map(_EXPANDED_URL, tweet_data['urls'])),
+    'hashtags': lambda tweet_data: list(map(_TEXT, tweet_data['hashtags'])),
+    'mentions': lambda tweet_data: list(map(_ID, tweet_data['mentions'])),
+    'reply_count': itemgetter('replyCount'),
+    'rt_count': itemgetter('rtCount'),
+    'likes_count': itemgetter('likesCount'),
+    'user_id': itemgetter('userId'),
+    'user_name': itemgetter('name'),
+    'user_screen_name': itemgetter('screenName'),
+    'quoted_tweet': _decode_quoted_tweet,
+    'media': _decode_media
+}
+
 # ==============================================================
 
 
@@ -85,31 +435,38 @@ class Tweet:
         media (list[dict]): ツイートに添付されたメディアのリスト
     """
 
+    __slots__ = (
+        'content', 'id', 'verified', 'urls', 'hashtags', 'mentions',
+        'created_at', 'reply_count', 'rt_count', 'likes_count',
+        'user_id', 'user_name', 'user_screen_name', 'quoted_tweet',
+        'media', '_raw', '_reply_count'
+    )
+
     def __init__(self, tweet_data: dict[str, Any]) -> None:
-        self.content = re.sub(r'\tSTART\t(.+)\tEND\t', r'\1', tweet_data['displayText'])
+        # id と created_at 以外は参照されたときに __getattr__ で変換する
+        self._raw = tweet_data
         self.id = tweet_data['id']
-        self.verified = tweet_data['verified']
-        self.urls = [url['expandedUrl'] for url in tweet_data['urls']]
-        self.hashtags = [hashtag['text'] for hashtag in tweet_data['hashtags']]
-        self.mentions = [mention['id'] for mention in tweet_data['mentions']]
         self.created_at = tweet_data['createdAt']
-        self.reply_count = tweet_data['replyCount']
-        self.rt_count = tweet_data['rtCount']
-        self.likes_count = tweet_data['likesCount']
-        self.user_id = tweet_data['userId']
-        self.user_name = tweet_data['name']
-        self.user_screen_name = tweet_data['screenName']
-        self.quoted_tweet = tweet_data.get('quotedTweet') and tweet_data['quotedTweet']['url'].split('?')[0]
-
-        self.media = [
-            {
-                'type': media['type'],
-                'url': media['item']['url']
-            } for media in tweet_data.get('media', [])
-        ]
 
         self._reply_count = 0
 
+    def __getattr__(self, name: str) -> Any:
+        # スロットが未設定のときだけ呼ばれるので、変換した値はスロットに保存する
+        decode = _LAZY_TWEET_FIELDS.get(name)
+        if decode is None:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+        try:
+            value = decode(self._raw)
+        except KeyError as e:
+            # hasattr / getattr のデフォルト値が使えるように AttributeError にする
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}' (missing key {e})"
+            ) from e
+
+        setattr(self, name, value)
+        return value
+
     def get_replies(self, times: int = 1) -> list[Tweet]:
         """ツイートのリプライを取得する
         一回の実行で最大10件の返信を取得できる
@@ -122,12 +479,48 @@ class Tweet:
         """
 
         results = []
+        append = results.append
 
         for _ in range(times):
             url = BASE_URL + f'/api/v1/pagination/tweet/{self.id}?start={self._reply_count}'
-            replies = [Tweet(i) for i in get_tweets_by_url(url)]
-            results += replies
-            self._reply_count += len(replies)
+            count = len(results)
+
+            for i in get_tweets_by_url(url):
+                append(Tweet(i))
+
+            self._reply_count += len(results) - count
+
+        return results
+
+    async def aget_replies(self, times: int = 1) -> list[Tweet]:
+        """get_replies の非同期版
+        times 回分のページを並行して取得する
+
+        Args:
+            times (int, optional): 返信を取得する回数。デフォルトは1回
+
+        Returns:
+            list[Tweet]: 取得した返信のリスト
+        """
+
+        return await self._aget_replies(_get_async_session(), times)
+
+    async def _aget_replies(self, session: aiohttp.ClientSession, times: int) -> list[Tweet]:
+        urls = [
+            BASE_URL + f'/api/v1/pagination/tweet/{self.id}?start={self._reply_count + k * PAGE_SIZE}'
+            for k in range(times)
+        ]
+        pages = await asyncio.gather(*(aget_tweets_by_url(url, session) for url in urls))
+
+        results = []
+
+        for page in pages:
+            results.extend(map(Tweet, page))
+            # 返信が尽きたページ以降は取得しすぎた分なので捨てる
+            if len(page) < PAGE_SIZE:
+                break
+
+        self._reply_count += len(results)
 
         return results
 
@@ -135,6 +528,28 @@ class Tweet:
         return f'<Tweet id="{self.id}">'
 
 
+async def gather_replies(tweets: list[Tweet], times: int = 1, concurrency: int = 32) -> list[list[Tweet]]:
+    """複数のツイートのリプライを並行して取得する
+
+    Args:
+        tweets (list[Tweet]): リプライを取得するツイートのリスト
+        times (int, optional): ツイート毎に返信を取得する回数。デフォルトは1回
+        concurrency (int, optional): 同時に取得するツイートの数の上限。デフォルトは32
+
+    Returns:
+        list[list[Tweet]]: tweets と同じ順番で並んだ返信のリスト
+    """
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with _new_async_session(concurrency) as session:
+        async def get_replies(tweet: Tweet) -> list[Tweet]:
+            async with semaphore:
+                return await tweet._aget_replies(session, times)
+
+        return await asyncio.gather(*(get_replies(tweet) for tweet in tweets))
+
+
 class Search:
     def __init__(self, query: str, search_media: bool = False, sort_by: Literal['t', 'h'] = 't') -> None:
         """
@@ -144,27 +559,30 @@ class Search:
             sort_by (Literal['t', 'h'], optional): 't'で新着順、'h'で人気順
         """
 
-        url = BASE_URL + f'/search?p={query}&md={sort_by}'
-        url += (search_media and '&mtype=image') or ''
+        params = {'p': query, 'md': sort_by}
+        if search_media:
+            params['mtype'] = 'image'
+
+        url = BASE_URL + f'/search?{urlencode(params)}'
 
         self.search_media = search_media
         self.query = query
         self.sort_by = sort_by
 
-        next_data = get_next_data(url)
-        tweet_list = next_data['props']['pageProps']['pageData']['timeline']['entry']
+        page_data = get_next_data(url)['props']['pageProps']['pageData']
+        tweet_list = page_data['timeline']['entry']
 
         results = [Tweet(i) for i in tweet_list]
-        self.results = sort_tweets(results) if sort_by == 't' else results
+        self.results = _check_order(results) if sort_by == 't' else results
 
         self._oldest_tweet_id = (results and results[-1].id) or ''
         self._latest_tweet_id = (results and results[0].id) or ''
         self._tweet_count = len(results)
-        self.crumb = next_data['props']['pageProps']['pageData']['pagination']['params']['crumb']
+        self.crumb = page_data['pagination']['params']['crumb']
 
         self.trend = make_trend_dict(
-            next_data['props']['pageProps']['pageData']['buzzTrend']['items'],
-            next_data['props']['pageProps']['pageData']['poptw']['items']
+            page_data['buzzTrend']['items'],
+            page_data['poptw']['items']
         )
 
     def get_more_tweets(self, times: int = 1) -> list[Tweet]:
@@ -178,34 +596,82 @@ class Search:
         results = []
 
         for _ in range(times):
-            url = BASE_URL + f'/api/v1/pagination?crumb={self.crumb}&p={self.query}&md={self.sort_by}'
-            url += (self.search_media and '&mtype=image') or ''
+            url = self._pagination_url()
 
+            tweets = [Tweet(i) for i in get_tweets_by_url(url)]
             if self.sort_by == 't':
-                url += f'&oldestTweetId={self._oldest_tweet_id}'
-            elif self.sort_by == 'h':
-                url += f'&start={self._tweet_count}'
+                _check_order(tweets)
 
-            tweets = [Tweet(i) for i in get_tweets_by_url(url)]
+            if tweets:
+                self._oldest_tweet_id = tweets[-1].id
+
+            self._tweet_count += len(tweets)
+            results.extend(tweets)
+
+        return results
+
+    async def aget_more_tweets(self, times: int = 1) -> list[Tweet]:
+        """get_more_tweets の非同期版
+        sort_by が 'h' の場合は times 回分のページを並行して取得する
+
+        Args:
+            times (int, optional): ツイートを取得する回数。デフォルトは1回。
+        """
+
+        session = _get_async_session()
+
+        if self.sort_by == 'h':
+            urls = [self._pagination_url(k * PAGE_SIZE) for k in range(times)]
+            pages = await asyncio.gather(*(aget_tweets_by_url(url, session) for url in urls))
+        else:
+            pages = None
+
+        results = []
+
+        for k in range(times):
+            if pages is None:
+                page = await aget_tweets_by_url(self._pagination_url(), session)
+            else:
+                page = pages[k]
+
+            tweets = [Tweet(i) for i in page]
             if self.sort_by == 't':
-                tweets = sort_tweets(tweets)
+                _check_order(tweets)
 
             if tweets:
                 self._oldest_tweet_id = tweets[-1].id
 
             self._tweet_count += len(tweets)
-            results += tweets
+            results.extend(tweets)
+
+            if pages is not None and len(page) < PAGE_SIZE:
+                break
 
         return results
 
+    def _pagination_url(self, offset: int = 0) -> str:
+        params = {'crumb': self.crumb, 'p': self.query, 'md': self.sort_by}
+        if self.search_media:
+            params['mtype'] = 'image'
+
+        if self.sort_by == 't':
+            params['oldestTweetId'] = self._oldest_tweet_id
+        elif self.sort_by == 'h':
+            params['start'] = self._tweet_count + offset
+
+        return BASE_URL + f'/api/v1/pagination?{urlencode(params)}'
+
     def get_latest_tweets(self) -> list[Tweet]:
         """最新のツイートを取得する
         """
 
-        url = BASE_URL + f'/api/v1/autoscroll?crumb={self.crumb}&p={self.query}&latestTweetId={self._latest_tweet_id}'
-        url += (self.search_media and '&mtype=image') or ''
+        params = {'crumb': self.crumb, 'p': self.query, 'latestTweetId': self._latest_tweet_id}
+        if self.search_media:
+            params['mtype'] = 'image'
+
+        url = BASE_URL + f'/api/v1/autoscroll?{urlencode(params)}'
 
-        tweets = sort_tweets([Tweet(i) for i in get_tweets_by_url(url)])
+        tweets = _check_order([Tweet(i) for i in get_tweets_by_url(url)])
 
         if tweets:
             self._latest_tweet_id = tweets[0].id
@@ -224,20 +690,39 @@ def get_transition(query: str, search_media: bool = False, interval: int = 900,
         search_media (bool, optional): メディア検索
         interval (int, optional): データの間隔。デフォルトは900秒
         span (int, optional): データの期間。デフォルトは21600秒
+
+    同じ引数での呼び出しは TRANSITION_CACHE_TTL 秒間キャッシュされる
     """
 
-    url = BASE_URL + f'/api/v1/transition?p={query}&interval={interval}&span={span}'
-    url += (search_media and '&mtype=image') or ''
+    key = (query, search_media, interval, span)
+    cached = _transition_cache.get(key)
+    if cached and time.monotonic() - cached[1] < TRANSITION_CACHE_TTL:
+        return copy.deepcopy(cached[0])
+
+    params = {'p': query, 'interval': interval, 'span': span}
+    if search_media:
+        params['mtype'] = 'image'
+
+    url = BASE_URL + f'/api/v1/transition?{urlencode(params)}'
 
-    response_data = get_json(url)
+    response_data = get_json(url, conditional=True)
+    tweet_transition = response_data['tweetTransition']
 
-    return {
-        'total': response_data['tweetTransition']['head']['totalResultsAvailable'],
-        'transitions': response_data['tweetTransition']['entry'],
+    transition = {
+        'total': tweet_transition['head']['totalResultsAvailable'],
+        'transitions': tweet_transition['entry'],
         'positive': response_data['sentimentPieChart']['positive'],
         'negative': response_data['sentimentPieChart']['negative']
     }
 
+    _transition_cache.pop(key, None)
+    _transition_cache[key] = (transition, time.monotonic())
+    if len(_transition_cache) > _TRANSITION_CACHE_SIZE:
+        del _transition_cache[next(iter(_transition_cache))]
+
+    # transitions はキャッシュと共有しているので、呼び出し元には複製を返す
+    return copy.deepcopy(transition)
+
 
 def get_trend() -> dict[Literal['trend', 'tweet', 'word'], Any]:
     """トレンドを取得する
@@ -247,10 +732,10 @@ def get_trend() -> dict[Literal['trend', 'tweet', 'word'], Any]:
     word: 急上昇ワード
     """
 
-    next_data = get_next_data(BASE_URL)
+    page_data = get_next_data(BASE_URL, conditional=True)['props']['pageProps']['pageData']
 
     return make_trend_dict(
-        next_data['props']['pageProps']['pageData']['buzzTrend']['items'],
-        next_data['props']['pageProps']['pageData']['poptw']['items'],
-        next_data['props']['pageProps']['pageData']['hotBuzz']['items']
+        page_data['buzzTrend']['items'],
+        page_data['poptw']['items'],
+        page_data['hotBuzz']['items']
     )
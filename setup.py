@@ -5,4 +5,8 @@ setup(
     version='0.1',
     packages=find_packages(),
     install_requires=['requests'],
+    extras_require={
+        'async': ['aiohttp'],
+        'speedups': ['orjson'],
+    },
 )